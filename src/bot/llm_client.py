@@ -2,51 +2,251 @@
 
 from __future__ import annotations
 
-import json  # LLM ストリーミングレスポンスの JSON 部分をパースするために json モジュールをインポート
+import gzip  # 大きなリクエストボディを圧縮して送信するために gzip モジュールをインポート
+import hashlib  # 応答キャッシュのキーとしてメッセージ配列のハッシュ値を計算するために hashlib をインポート
+from collections import OrderedDict  # 応答キャッシュを LRU として管理するために OrderedDict をインポート
 from typing import Any, AsyncIterator  # 任意の型および非同期イテレータ型を表現するためにインポート
 
 import httpx  # 非同期 HTTP クライアントとして httpx をインポート
+import orjson  # リクエストボディのシリアライズとストリーミングレスポンスのパースを高速に行うために orjson をインポート
 
 from .settings import settings  # アプリ共通設定をインポート
 
 
+# Settings は不変のため、リクエストごとに参照する設定値はインポート時にモジュール定数として取り出しておく
+# 利用するモデル名
+_MODEL = settings.llm_model
+# システムプロンプト（空文字列の場合は送信しない）
+_SYSTEM_PROMPT = settings.llm_system_prompt
+# 画像入力に対応したモデルかどうかのフラグ
+_SUPPORTS_VISION = settings.llm_supports_vision
+# ベース URL とエンドポイントパスを結合した完全なエンドポイント URL
+_ENDPOINT_URL = f"{settings.llm_base_url.rstrip('/')}{settings.llm_chat_path}"
+# orjson でシリアライズ済みのボディを送信する際に付与するリクエストヘッダー
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# gzip 圧縮したボディを送信する際に付与するリクエストヘッダー
+_GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+# このバイト数以上のリクエストボディを gzip 圧縮して送信する（0 の場合は圧縮しない）
+_GZIP_MIN_BYTES = settings.llm_gzip_request_min_bytes
+
+# ストリーミングレスポンスを読み取る際のチャンクサイズ（小さすぎると Python 側のループ回数が増えるため 64 KiB とする）
+_SSE_CHUNK_SIZE = 65536
+
+
+def _extract_sse_data(frame: bytes) -> bytes | None:
+    """1 つの SSE イベントから data フィールドの内容を取り出すヘルパー関数。"""
+
+    # 大半のイベントは data 行 1 行だけで構成されるため、その場合は分割せずに直接スライスする
+    if frame.startswith(b"data:") and b"\n" not in frame:
+        return frame[len(b"data:") :].strip()
+    # 複数行で構成されるイベントの data 行を順番に格納するリスト
+    data_lines: list[bytes] = []
+    # イベントを行単位に分割し、data で始まる行だけを取り出す
+    for line in frame.split(b"\n"):
+        if line.startswith(b"data:"):
+            data_lines.append(line[len(b"data:") :].strip())
+    # data 行が 1 つも無いイベント（コメントや event 行のみ）の場合は None を返す
+    if not data_lines:
+        return None
+    # SSE の仕様に従い、複数の data 行は改行で連結して 1 つのデータとして扱う
+    return b"\n".join(data_lines)
+
+
+def _loads_json(data_bytes: bytes) -> Any | None:
+    """バイト列を JSON としてパースし、失敗した場合は例外を送出せず None を返すヘルパー関数。"""
+
+    try:
+        # バイト列として受け取った JSON 片を文字列にデコードせず orjson で直接 Python オブジェクトに変換
+        return orjson.loads(data_bytes)
+    except orjson.JSONDecodeError:
+        # JSON のパースや文字コードの解釈に失敗した場合は None を返す
+        return None
+
+
+class _SSEFrameBuilder:
+    """受信したバイト列を溜め込み、完結した SSE イベントの data フィールドを取り出す逐次パーサークラス。"""
+
+    # インスタンスごとの属性辞書を持たせず、属性アクセスを軽量にする
+    __slots__ = ("_buf", "_scan_start")
+
+    def __init__(self) -> None:
+        """パーサーの初期化を行うコンストラクタ。"""
+
+        # 完全なイベントが揃うまで受信済みのバイト列を溜めておくバッファ
+        self._buf = bytearray()
+        # 区切りが見つからなかった範囲を再走査しないよう、次回の検索開始位置を保持
+        self._scan_start = 0
+
+    def _find_frame_end(self) -> tuple[int, int]:
+        """次の SSE イベント区切り（空行）を探し、(イベント末尾の位置, 区切りを含めて削除する位置) を返すヘルパーメソッド。
+
+        区切りが見つからない場合は (-1, 次回の検索開始位置) を返す。
+        """
+
+        # 改行位置だけを前回の続きから順に辿り、各バイトを 1 回ずつしか走査しないようにする
+        pos = self._buf.find(b"\n", self._scan_start)
+        while pos != -1:
+            # 改行直後の 1 バイトを確認
+            next_byte = self._buf[pos + 1 : pos + 2]
+            # LF が連続していれば LF 区切りの空行
+            if next_byte == b"\n":
+                return pos, pos + 2
+            if next_byte == b"\r":
+                # CR の次が LF であれば CRLF 区切りの空行（イベント末尾に残る CR は呼び出し側の strip で除去される）
+                after_cr = self._buf[pos + 2 : pos + 3]
+                if after_cr == b"\n":
+                    return pos, pos + 3
+                # CR でバッファが終わっている場合は続きを受信してからこの改行位置を再確認する
+                if not after_cr:
+                    return -1, pos
+            elif not next_byte:
+                # 改行でバッファが終わっている場合も続きを受信してからこの改行位置を再確認する
+                return -1, pos
+            # 空行ではなかったため次の改行位置へ進む
+            pos = self._buf.find(b"\n", pos + 1)
+        # 改行が見つからなかった範囲は次回走査しない
+        return -1, len(self._buf)
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """受信したチャンクを追加し、新たに完結したイベントの data フィールドを順番に返すメソッド。"""
+
+        # 受信したチャンクをバッファ末尾に追加
+        self._buf.extend(chunk)
+        # 今回取り出せた data フィールドを格納するリスト
+        payloads: list[bytes] = []
+        # バッファ内の完全なイベントを先頭から順に取り出す
+        while True:
+            # 次のイベント区切りの位置を検索し、見つからなければ追加の受信を待つ
+            end, consumed = self._find_frame_end()
+            if end == -1:
+                # 走査済みの範囲を再走査しないよう、次回の検索開始位置を記録する
+                self._scan_start = consumed
+                break
+            # 区切りまでを 1 つのイベントとして取り出し、区切りごとバッファから削除
+            frame = bytes(self._buf[:end])
+            del self._buf[:consumed]
+            # 先頭を削除したため、検索開始位置をバッファ先頭に戻す
+            self._scan_start = 0
+            # イベントから data フィールドを取り出し、存在する場合のみ結果に追加
+            data_bytes = _extract_sse_data(frame.strip())
+            if data_bytes is not None:
+                payloads.append(data_bytes)
+        # 取り出した data フィールドの一覧を返す
+        return payloads
+
+    def flush(self) -> list[bytes]:
+        """ストリーム終了時に、空行で終わらずに残ったイベントの data フィールドを返すメソッド。"""
+
+        # バッファに残ったバイト列を取り出してバッファを空にする
+        frame = bytes(self._buf).strip()
+        self._buf.clear()
+        self._scan_start = 0
+        # 残りが空であれば返すものは無い
+        if not frame:
+            return []
+        # 残ったイベントから data フィールドを取り出し、存在する場合のみ返す
+        data_bytes = _extract_sse_data(frame)
+        return [data_bytes] if data_bytes is not None else []
+
+
 class LocalLLMClient:
     """ローカル LLM とのチャット補完 API を呼び出すクライアントクラス。"""
 
     def __init__(self) -> None:
         """クライアントの初期化を行うコンストラクタ。"""
 
-        # ベース URL とエンドポイントパスを結合して完全なエンドポイント URL を作成
-        self._endpoint_url = f"{settings.llm_base_url.rstrip('/')}{settings.llm_chat_path}"
+        # モジュール定数として組み立て済みの完全なエンドポイント URL を保持
+        self._endpoint_url = _ENDPOINT_URL
+        # system メッセージ辞書は呼び出しごとに内容が変わらないため一度だけ生成して使い回す
+        # （messages 配列はシリアライズされるだけで変更されないため、同じ辞書を共有しても安全）
+        self._system_message: dict[str, Any] | None = (
+            {"role": "system", "content": _SYSTEM_PROMPT} if _SYSTEM_PROMPT else None
+        )
         # 共通で利用する HTTP タイムアウト秒数を属性として保持
         self._timeout_seconds = 60.0
+        # 同時リクエストが接続プールの空き待ちで直列化しないよう、設定値から接続数の上限を構築
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        )
+        # リクエストごとの TCP / TLS ハンドシェイクを避けるため、接続プールを持つ HTTP クライアントを一度だけ生成して使い回す
+        # HTTP/2 が有効な場合は 1 本の接続上で複数リクエストを多重化できるようにする
+        self._client = httpx.AsyncClient(
+            timeout=self._timeout_seconds,
+            limits=limits,
+            http2=settings.llm_http2,
+        )
+        # 応答キャッシュに保持する最大件数を設定から取得（0 の場合はキャッシュを利用しない）
+        self._reply_cache_size = settings.llm_cache_size
+        # 同一のメッセージ配列に対する完全な応答を保持する LRU キャッシュ（末尾ほど最近利用された応答）
+        self._reply_cache: OrderedDict[bytes, str] = OrderedDict()
+
+    async def aclose(self) -> None:
+        """共有している HTTP クライアントを閉じ、プール済みの接続を解放するメソッド。"""
+
+        # アプリ終了時に呼び出され、保持している接続をすべてクローズする
+        await self._client.aclose()
+
+    @staticmethod
+    def _encode_payload(payload: dict[str, Any]) -> tuple[bytes, dict[str, str]]:
+        """ペイロードを JSON バイト列にシリアライズし、必要に応じて gzip 圧縮したボディとヘッダーを返すヘルパー関数。"""
+
+        # ペイロードを orjson で一度だけバイト列にシリアライズ（標準 json モジュールより高速）
+        body = orjson.dumps(payload)
+        # 圧縮が有効かつボディが閾値以上の大きさの場合のみ、速度優先の圧縮レベルで gzip 圧縮する
+        if _GZIP_MIN_BYTES > 0 and len(body) >= _GZIP_MIN_BYTES:
+            return gzip.compress(body, compresslevel=1), _GZIP_JSON_HEADERS
+        # それ以外は非圧縮のボディと通常の JSON ヘッダーを返す
+        return body, _JSON_HEADERS
+
+    @staticmethod
+    def _cache_key(messages: list[dict[str, Any]]) -> bytes:
+        """LLM に渡すメッセージ配列全体（system / 履歴 / ユーザー発言 / 画像）から応答キャッシュのキーを計算するヘルパー関数。"""
+
+        # メッセージ配列を orjson でシリアライズし、短いハッシュ値をキーとして利用する
+        return hashlib.blake2b(orjson.dumps(messages), digest_size=16).digest()
+
+    def _get_cached_reply(self, key: bytes) -> str | None:
+        """応答キャッシュから応答を取得し、ヒットした場合は最近利用されたものとして扱うヘルパーメソッド。"""
+
+        # キーに対応する応答を取得し、存在しなければ None を返す
+        cached = self._reply_cache.get(key)
+        if cached is None:
+            return None
+        # ヒットした応答を末尾へ移動し、LRU の順序を更新する
+        self._reply_cache.move_to_end(key)
+        # キャッシュ済みの応答を返す
+        return cached
+
+    def _store_cached_reply(self, key: bytes, reply: str) -> None:
+        """応答キャッシュに完全な応答を保存し、上限を超えた古い応答を破棄するヘルパーメソッド。"""
+
+        # 応答を保存し、最近利用されたものとして末尾へ移動
+        self._reply_cache[key] = reply
+        self._reply_cache.move_to_end(key)
+        # 上限件数を超えた場合は最も長く利用されていない応答から破棄
+        while len(self._reply_cache) > self._reply_cache_size:
+            self._reply_cache.popitem(last=False)
+
+    def new_messages_prefix(self) -> list[dict[str, Any]]:
+        """会話ごとに保持するメッセージ配列の雛形（システムプロンプトのみを含む）を新しく生成して返すメソッド。"""
+
+        # システムプロンプトが指定されている場合は生成済みの system メッセージを先頭に持つリストを、無ければ空のリストを返す
+        return [self._system_message] if self._system_message else []
 
     def _build_messages(
         self,
         user_message: str,
         history_messages: list[dict[str, Any]] | None,
         image_urls: list[str] | None,
+        messages_prefix: list[dict[str, Any]] | None = None,
     ) -> list[dict[str, Any]]:
         """system / 履歴 / 画像情報 / 現在のユーザーメッセージをまとめて LLM に渡すメッセージ配列を構築するヘルパー関数。"""
 
-        # LLM に渡すメッセージ一覧を初期化するための空リストを用意
-        messages: list[dict[str, Any]] = []
-        # 設定でシステムプロンプトが指定されている場合は最初のメッセージとして追加
-        if settings.llm_system_prompt:
-            # system 役割のメッセージ辞書を作成し messages リストに追加
-            messages.append(
-                {
-                    "role": "system",
-                    "content": settings.llm_system_prompt,
-                },
-            )
-        # 呼び出し元から渡された会話履歴メッセージがあれば順番どおりに追加
-        if history_messages:
-            # 履歴メッセージは既に role / content を含むと想定し、そのまま extend する
-            messages.extend(history_messages)
-        # ユーザーからの入力メッセージを role=user のメッセージとしてリストに追加
+        # ユーザーからの入力メッセージを role=user のメッセージとして構築
         # 画像入力に対応しているモデルの場合は text + image_url の複合メッセージ形式を組み立てる
-        if settings.llm_supports_vision and image_urls:
+        if _SUPPORTS_VISION and image_urls:
             # Vision 対応モデル向けに、テキストと画像 URL を両方含む content 配列を構築する
             content_parts: list[dict[str, Any]] = [
                 {
@@ -65,106 +265,183 @@ class LocalLLMClient:
                         },
                     },
                 )
-            # 構築した content 配列を持つ user メッセージを messages リストに追加
-            messages.append(
-                {
-                    "role": "user",
-                    "content": content_parts,
-                },
-            )
+            # 構築した content 配列を持つ user メッセージを作成
+            user_entry: dict[str, Any] = {
+                "role": "user",
+                "content": content_parts,
+            }
         else:
-            # Vision 非対応、または画像が無い場合は従来どおりテキストのみの user メッセージを追加
-            messages.append(
-                {
-                    "role": "user",
-                    "content": user_message,
-                },
-            )
+            # Vision 非対応、または画像が無い場合は従来どおりテキストのみの user メッセージを作成
+            user_entry = {
+                "role": "user",
+                "content": user_message,
+            }
+        # system と履歴を含む構築済みのメッセージ配列が渡された場合は、末尾にユーザーメッセージを加えた新しいリストを返す
+        # （呼び出し元が保持している配列そのものは変更しない）
+        if messages_prefix is not None:
+            return messages_prefix + [user_entry]
+
+        # システムプロンプトが指定されている場合は生成済みの system メッセージを先頭に置いてメッセージ一覧を初期化
+        messages: list[dict[str, Any]] = [self._system_message] if self._system_message else []
+        # 呼び出し元から渡された会話履歴メッセージがあれば順番どおりに追加
+        if history_messages:
+            # 履歴メッセージは既に role / content を含むと想定し、そのまま extend する
+            messages.extend(history_messages)
+        # 構築したユーザーメッセージをリスト末尾に追加
+        messages.append(user_entry)
         # 構築したメッセージ配列を呼び出し元に返却
         return messages
 
+    @staticmethod
+    async def _iter_sse_payloads(response: httpx.Response) -> AsyncIterator[bytes]:
+        """ストリーミングレスポンスをチャンク単位で読み取り、パーサーが取り出した data フィールドを返す非同期イテレータ。"""
+
+        # 受信したバイト列からイベント単位の data フィールドを取り出す逐次パーサーを用意
+        builder = _SSEFrameBuilder()
+        # 64 KiB 単位で受信したチャンクをパーサーに渡し、完結したイベントの data フィールドを順番に返す
+        async for chunk in response.aiter_bytes(_SSE_CHUNK_SIZE):
+            for data_bytes in builder.feed(chunk):
+                yield data_bytes
+        # 末尾が空行で終わらずに切断された場合でも、残ったイベントを取りこぼさないよう処理する
+        for data_bytes in builder.flush():
+            yield data_bytes
+
     async def stream_reply(
         self,
         user_message: str,
         history_messages: list[dict[str, Any]] | None = None,
         image_urls: list[str] | None = None,
+        messages_prefix: list[dict[str, Any]] | None = None,
     ) -> AsyncIterator[str]:
         """ローカル LLM からのストリーミングレスポンスをチャンクごとに返す非同期イテレータメソッド。"""
 
         # LLM へ送信する messages 配列をヘルパー関数で構築
-        messages = self._build_messages(user_message, history_messages, image_urls)
+        messages = self._build_messages(user_message, history_messages, image_urls, messages_prefix)
+        # 応答キャッシュが有効な場合のみキャッシュキーを計算し、受信した断片を保存用に溜めておくリストを用意
+        cache_key = self._cache_key(messages) if self._reply_cache_size > 0 else None
+        received_pieces: list[str] = []
+        if cache_key is not None:
+            # 同一のメッセージ配列に対する完全な応答がキャッシュにあれば、LLM を呼び出さずに一括で返す
+            cached_reply = self._get_cached_reply(cache_key)
+            if cached_reply is not None:
+                yield cached_reply
+                return
         # OpenAI 互換ストリーミング API を想定し、stream フラグを True に設定したペイロードを構築
         payload: dict[str, Any] = {
-            "model": settings.llm_model,
+            "model": _MODEL,
             "messages": messages,
             "stream": True,
         }
-        # 非同期 HTTP クライアントコンテキストを開き、ストリーミングレスポンスを扱えるようにする
-        async with httpx.AsyncClient(timeout=self._timeout_seconds) as client:
-            # client.stream を用いてストリーミングモードで POST リクエストを送信
-            async with client.stream("POST", self._endpoint_url, json=payload) as response:
-                # ステータスコードがエラーの場合は例外を送出して呼び出し元で処理させる
-                response.raise_for_status()
-                # レスポンスボディを 1 行ずつ非同期に読み取り処理する
-                async for line in response.aiter_lines():
-                    # 行が None または空文字列の場合はスキップして次の行へ進む
-                    if not line:
-                        continue
-                    # 前後の空白文字を削除して判定しやすくする
-                    line = line.strip()
-                    # OpenAI 互換のストリーミングでは "data:" で始まる行に JSON が含まれるためそれ以外は無視
-                    if not line.startswith("data:"):
-                        continue
-                    # 先頭の "data:" を取り除いた文字列部分を取り出す
-                    data_str = line[len("data:") :].strip()
-                    # [DONE] はストリーム終了を意味するためループを抜けて処理を終了
-                    if data_str == "[DONE]":
-                        break
-                    try:
-                        # 文字列として受け取った JSON 片を辞書オブジェクトに変換
-                        data = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        # JSON のパースに失敗した場合はその行をスキップして次に進む
-                        continue
-                    # choices 配列から先頭要素を取得し、存在しなければ次の行へ進む
-                    choices = data.get("choices", [])
-                    if not choices:
-                        continue
-                    first_choice = choices[0]
-                    # OpenAI 互換ストリームでは delta 内に差分トークンが入るため delta を取得
-                    delta: dict[str, Any] = first_choice.get("delta", {})
-                    # delta から content フィールドを取り出し、存在しなければ空文字列とする
-                    content_piece = delta.get("content", "")
-                    # content_piece が空の場合は何もユーザーに返すべきテキストが無いためスキップ
-                    if not content_piece:
-                        continue
-                    # 非空の文字列断片を呼び出し元に yield して疑似ストリーミングを実現
-                    yield str(content_piece)
+        # ペイロードをシリアライズし、大きい場合は gzip 圧縮したボディとヘッダーを取得
+        body, headers = self._encode_payload(payload)
+        # 共有 HTTP クライアントの stream を用いてストリーミングモードで POST リクエストを送信
+        async with self._client.stream(
+            "POST",
+            self._endpoint_url,
+            content=body,
+            headers=headers,
+        ) as response:
+            # ステータスコードがエラーの場合は例外を送出して呼び出し元で処理させる
+            response.raise_for_status()
+            # 1 つの JSON が複数イベントに分割されて届いた場合に、断片を連結せずに溜めておくリスト
+            pending_fragments: list[bytes] = []
+            # 行単位ではなく大きめのチャンク単位で読み取り、完結したイベントの data フィールドだけを順番に処理する
+            async for data_bytes in self._iter_sse_payloads(response):
+                # [DONE] はストリーム終了を意味するためループを抜けて処理を終了
+                if data_bytes == b"[DONE]":
+                    break
+                # 溜めている断片が無い状態で { / [ 以外から始まるデータ（ping などの keepalive やエラー文字列）は
+                # JSON の先頭になり得ないため、後続の差分と連結してしまわないようここで無視する
+                if not pending_fragments and data_bytes[:1] not in (b"{", b"["):
+                    continue
+                # 受信した断片をリスト末尾に追加し、文字列連結によるコピーの繰り返しを避ける
+                pending_fragments.append(data_bytes)
+                # 末尾が } / ] で終わらないデータは JSON として未完結とみなし、パースを試みずに続きを待つ
+                if data_bytes[-1:] not in (b"}", b"]"):
+                    continue
+                # 完結したと判断できた時点で初めて断片を 1 つのバイト列に結合してパースする
+                fragment_count = len(pending_fragments)
+                json_bytes = pending_fragments[0] if fragment_count == 1 else b"".join(pending_fragments)
+                data = _loads_json(json_bytes)
+                # 次の JSON に備えて断片リストを空にする
+                pending_fragments.clear()
+                # 連結結果がパースできない場合は、直前までの断片が壊れていた可能性があるため最後の断片だけで再度パースする
+                if data is None and fragment_count > 1:
+                    data = _loads_json(data_bytes)
+                # それでもパースできない場合はそのイベントをスキップして次に進む
+                if data is None:
+                    continue
+                # 辞書以外（配列など）の JSON は想定外の形式のため無視する
+                if not isinstance(data, dict):
+                    continue
+                # choices 配列から先頭要素を取得し、存在しなければ次のイベントへ進む
+                choices = data.get("choices", [])
+                if not choices:
+                    continue
+                first_choice = choices[0]
+                # OpenAI 互換ストリームでは delta 内に差分トークンが入るため delta を取得
+                delta: dict[str, Any] = first_choice.get("delta", {})
+                # delta から content フィールドを取り出し、存在しなければ空文字列とする
+                content_piece = delta.get("content", "")
+                # content_piece が空の場合は何もユーザーに返すべきテキストが無いためスキップ
+                if not content_piece:
+                    continue
+                # 応答キャッシュが有効な場合は、ストリーム完了後に保存するため断片を記録しておく
+                if cache_key is not None:
+                    received_pieces.append(str(content_piece))
+                # 非空の文字列断片を呼び出し元に yield して疑似ストリーミングを実現
+                yield str(content_piece)
+        # ストリームを最後まで受信できた場合のみ、完全な応答をキャッシュに保存する
+        if cache_key is not None and received_pieces:
+            self._store_cached_reply(cache_key, "".join(received_pieces))
 
     async def generate_reply(
         self,
         user_message: str,
         history_messages: list[dict[str, Any]] | None = None,
         image_urls: list[str] | None = None,
+        messages_prefix: list[dict[str, Any]] | None = None,
     ) -> str:
-        """ストリーミングメソッドを内部的に利用して最終的な全文応答を返すラッパーメソッド。"""
-
-        # 受信したトークン断片を順番に格納するためのリストを初期化
-        chunks: list[str] = []
-        # stream_reply から送られてくるテキスト断片を非同期イテレータで順次取得
-        async for piece in self.stream_reply(
-            user_message=user_message,
-            history_messages=history_messages,
-            image_urls=image_urls,
-        ):
-            # 各テキスト断片をリストに追加していく
-            chunks.append(piece)
-        # 受信した断片を結合して最終的な応答全文を生成
-        full_text = "".join(chunks)
-        # 結合結果が空文字列の場合は LLM から意味のある応答が返ってきていないためプレースホルダを返す
+        """ストリーミングを使わずに 1 回の POST リクエストでローカル LLM から全文応答を取得して返すメソッド。"""
+
+        # LLM へ送信する messages 配列をヘルパー関数で構築
+        messages = self._build_messages(user_message, history_messages, image_urls, messages_prefix)
+        # 応答キャッシュが有効な場合のみキャッシュキーを計算
+        cache_key = self._cache_key(messages) if self._reply_cache_size > 0 else None
+        if cache_key is not None:
+            # 同一のメッセージ配列に対する応答がキャッシュにあれば、LLM を呼び出さずにそのまま返す
+            cached_reply = self._get_cached_reply(cache_key)
+            if cached_reply is not None:
+                return cached_reply
+        # 全文を一度に受け取れば十分なため、stream フラグを False に設定したペイロードを構築
+        payload: dict[str, Any] = {
+            "model": _MODEL,
+            "messages": messages,
+            "stream": False,
+        }
+        # ペイロードをシリアライズし、大きい場合は gzip 圧縮したボディとヘッダーを取得
+        body, headers = self._encode_payload(payload)
+        # 共有 HTTP クライアントでシリアライズ済みのボディを POST 送信
+        response = await self._client.post(
+            self._endpoint_url,
+            content=body,
+            headers=headers,
+        )
+        # ステータスコードがエラーの場合は例外を送出して呼び出し元で処理させる
+        response.raise_for_status()
+        # レスポンスボディのバイト列を orjson で直接辞書オブジェクトに変換
+        data = orjson.loads(response.content)
+        # OpenAI 互換レスポンスの choices[0].message.content から応答本文を取り出す
+        choices = data.get("choices", []) if isinstance(data, dict) else []
+        message: dict[str, Any] = choices[0].get("message", {}) if choices else {}
+        full_text = str(message.get("content") or "")
+        # 応答本文が空文字列の場合は LLM から意味のある応答が返ってきていないためプレースホルダを返す
         if not full_text:
             # 呼び出し元の UX を考慮し、ユーザーにも理解しやすいメッセージにする
             return "ローカル LLM の応答内容が空でした。"
+        # 応答キャッシュが有効な場合は取得した全文を保存する
+        if cache_key is not None:
+            self._store_cached_reply(cache_key, full_text)
         # 正常に取得したコンテンツ文字列をそのまま返す
         return full_text
 
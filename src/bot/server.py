@@ -2,28 +2,44 @@
 
 from __future__ import annotations
 
-import json  # Bot Framework の JSON ペイロードを扱うために json モジュールをインポート
-from typing import Any  # 任意の型を表すために Any をインポート
+from contextlib import asynccontextmanager  # アプリの起動・終了処理を lifespan として定義するためにインポート
+from typing import Any, AsyncIterator  # 任意の型および非同期イテレータ型を表すためにインポート
 
 from fastapi import (  # FastAPI 本体と HTTP 関連の機能をインポート
     FastAPI,
     HTTPException,
     Request,
 )
-from fastapi.responses import JSONResponse  # JSON レスポンス生成用のクラスをインポート
+from fastapi.responses import ORJSONResponse  # orjson で高速にシリアライズする JSON レスポンス生成用のクラスをインポート
 from botbuilder.core import (  # Bot Framework 用のアダプターや Bot 実行用クラスをインポート
     BotFrameworkAdapter,
     BotFrameworkAdapterSettings,
     TurnContext,
 )
 from botbuilder.schema import Activity  # 受信したリクエストを Bot Activity に変換するためのクラスをインポート
+import orjson  # Bot Framework の JSON ペイロードを高速にパースするために orjson をインポート
 
+from .llm_client import llm_client  # 終了時に接続を閉じるため共有 LLM クライアントをインポート
 from .settings import settings  # 共通設定オブジェクトをインポート
 from .teams_bot import TeamsLLMBot  # 実際の Bot 実装クラスをインポート
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """アプリの起動から終了までのライフサイクルを管理するコンテキストマネージャ。"""
+
+    # 起動時に必要な処理は無いため、そのままアプリケーションの処理に制御を渡す
+    yield
+    # アプリ終了時に共有 LLM クライアントを閉じ、プール済みの接続を解放する
+    await llm_client.aclose()
+
+
 # FastAPI アプリケーションインスタンスを生成
-app = FastAPI(title="Teams LLM Bot")
+app = FastAPI(
+    title="Teams LLM Bot",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Bot Framework アダプターの設定オブジェクトを生成
 adapter_settings = BotFrameworkAdapterSettings(
@@ -38,7 +54,7 @@ bot = TeamsLLMBot()
 
 
 @app.post("/api/messages")
-async def messages(request: Request) -> JSONResponse:
+async def messages(request: Request) -> ORJSONResponse:
     """Bot Framework / Teams から送られてくるメッセージリクエストを処理するエンドポイント。"""
 
     # リクエストヘッダーから Content-Type を取得し、小文字に変換して比較しやすくする
@@ -51,8 +67,10 @@ async def messages(request: Request) -> JSONResponse:
             detail="Content-Type must be application/json.",
         )
 
-    # リクエストボディの JSON を Python オブジェクトとして非同期に取得
-    body: dict[str, Any] = await request.json()
+    # リクエストボディをバイト列のまま非同期に取得
+    raw_body = await request.body()
+    # 取得したバイト列を orjson で直接 Python オブジェクトに変換
+    body: dict[str, Any] = orjson.loads(raw_body)
     # 取得したボディを Activity.from_dict で Bot Framework の Activity オブジェクトに変換
     activity = Activity().deserialize(body)
     # リクエストのクエリパラメータから auth ヘッダー相当の値を取得（本番環境では認証に利用）
@@ -73,16 +91,13 @@ async def messages(request: Request) -> JSONResponse:
         aux_func,
     )
 
-    # adapter.process_activity の戻り値は HTTP レスポンスオブジェクト互換のため、
-    # ステータスコードとボディを FastAPI の JSONResponse に詰め替えて返却
+    # adapter.process_activity の戻り値は InvokeResponse であり、そのボディはバイト列ではなく
+    # JSON シリアライズ可能なオブジェクト（expect_replies の場合は ExpectedReplies を serialize した dict など）のため、
+    # デコードやパースはせず ORJSONResponse で一度だけシリアライズして返却
     if response:
-        # レスポンスのボディを JSON 文字列として取得
-        body_text = response.body.decode("utf-8") if response.body else ""
-        # ボディが空でない場合は JSON 文字列を Python オブジェクトに変換し、空なら空辞書とする
-        json_body: Any = json.loads(body_text) if body_text else {}
-        # ステータスコードと JSON ボディを指定して JSONResponse を生成しクライアントに返却
-        return JSONResponse(status_code=response.status, content=json_body)
+        # ボディが空の場合は従来どおり空の JSON オブジェクトを返す
+        return ORJSONResponse(status_code=response.status, content=response.body or {})
 
     # Bot から特に明示的なレスポンスが無い場合は 204 No Content を返す
-    return JSONResponse(status_code=204, content=None)
+    return ORJSONResponse(status_code=204, content=None)
 
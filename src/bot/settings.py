@@ -8,6 +8,13 @@ from typing import Final  # 不変（定数）を表現するために Final を
 
 import yaml  # YAML 形式の設定ファイルを読み書きするために PyYAML をインポート
 
+try:
+    # libyaml が利用可能な場合は C 実装の高速な SafeLoader を利用
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    # libyaml が無い環境では純 Python 実装の SafeLoader にフォールバック
+    from yaml import SafeLoader
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -17,6 +24,12 @@ class Settings:
     microsoft_app_id: str
     # Bot Framework から送信されるリクエストの検証に使用するアプリ パスワード
     microsoft_app_password: str
+    # 会話履歴をメモリ上に保持する会話数の上限
+    max_conversations: int
+    # 最後の利用からこの秒数が経過した会話の履歴を破棄する
+    conversation_ttl_seconds: float
+    # 1 つの会話で保持して LLM に渡す履歴メッセージ数の上限
+    history_max_messages: int
     # ローカル LLM の HTTP ベース URL
     llm_base_url: str
     # ローカル LLM のチャット補完エンドポイントパス
@@ -31,6 +44,18 @@ class Settings:
     llm_system_prompt: str
     # 利用するローカル LLM が画像入力に対応しているかどうかを表すフラグ
     llm_supports_vision: bool
+    # 同一の入力に対する LLM 応答をメモリ上に保持する件数の上限（0 の場合はキャッシュしない）
+    llm_cache_size: int
+    # ローカル LLM への HTTP 接続プールで同時に保持できる最大接続数
+    llm_max_connections: int
+    # ローカル LLM への HTTP 接続プールで keep-alive 状態のまま保持する最大接続数
+    llm_max_keepalive_connections: int
+    # keep-alive 状態の接続を破棄するまでのアイドル秒数
+    llm_keepalive_expiry: float
+    # ローカル LLM との通信で HTTP/2 を利用するかどうかのフラグ
+    llm_http2: bool
+    # このバイト数以上のリクエストボディを gzip 圧縮して送信する（0 の場合は圧縮しない）
+    llm_gzip_request_min_bytes: int
 
 
 def _project_root() -> Path:
@@ -74,8 +99,8 @@ def _load_config_dict(config_path: Path) -> dict:
 
     # config.yaml の内容をテキストとして読み込む
     yaml_text = config_path.read_text(encoding="utf-8")
-    # 読み込んだ YAML テキストを安全なモードでパースして Python オブジェクトに変換
-    data = yaml.safe_load(yaml_text) or {}
+    # 読み込んだ YAML テキストを安全なモード（可能なら C 実装）でパースして Python オブジェクトに変換
+    data = yaml.load(yaml_text, Loader=SafeLoader) or {}
     # 返り値の型を明示するため dict 型にキャストして返却
     return dict(data)
 
@@ -101,6 +126,12 @@ def load_settings() -> Settings:
     microsoft_app_id = str(bot_cfg.get("microsoft_app_id", ""))
     # Bot Framework 用のアプリ パスワードを bot セクションから取得し、未設定なら空文字列を用いる
     microsoft_app_password = str(bot_cfg.get("microsoft_app_password", ""))
+    # 会話履歴を保持する会話数の上限を bot セクションから取得し、未設定なら 10000 を利用
+    max_conversations = int(bot_cfg.get("max_conversations", 10000))
+    # 会話履歴の有効期限（秒）を bot セクションから取得し、未設定なら 24 時間を利用
+    conversation_ttl_seconds = float(bot_cfg.get("conversation_ttl_seconds", 86400))
+    # 1 会話あたりの履歴メッセージ数の上限を bot セクションから取得し、未設定なら 10 往復分の 20 件を利用
+    history_max_messages = int(bot_cfg.get("history_max_messages", 20))
 
     # ローカル LLM ベース URL を llm セクションから取得し、未設定ならデフォルト URL を利用
     llm_base_url = str(llm_cfg.get("base_url", "http://localhost:1234"))
@@ -112,6 +143,20 @@ def load_settings() -> Settings:
     llm_system_prompt = str(llm_cfg.get("system_prompt", ""))
     # Vision 対応フラグを llm セクションから取得し、未設定なら False を利用
     llm_supports_vision = bool(llm_cfg.get("supports_vision", False))
+    # 応答キャッシュの件数上限を llm セクションから取得し、未設定なら 0（キャッシュ無効）を利用
+    llm_cache_size = int(llm_cfg.get("cache_size", 0))
+    # 接続プール関連設定を llm セクション内の limits サブセクションから取得し、存在しない場合は空辞書を用意
+    limits_cfg = dict(llm_cfg.get("limits", {}))
+    # 最大同時接続数を limits から取得し、未設定なら 1000 を利用
+    llm_max_connections = int(limits_cfg.get("max_connections", 1000))
+    # keep-alive で保持する最大接続数を limits から取得し、未設定なら 100 を利用
+    llm_max_keepalive_connections = int(limits_cfg.get("max_keepalive_connections", 100))
+    # keep-alive 接続のアイドル有効期限（秒）を limits から取得し、未設定なら 30 秒を利用
+    llm_keepalive_expiry = float(limits_cfg.get("keepalive_expiry", 30.0))
+    # HTTP/2 利用フラグを llm セクションから取得し、未設定なら False を利用
+    llm_http2 = bool(llm_cfg.get("http2", False))
+    # リクエストボディを gzip 圧縮する閾値を llm セクションから取得し、未設定なら 0（圧縮しない）を利用
+    llm_gzip_request_min_bytes = int(llm_cfg.get("gzip_request_min_bytes", 0))
 
     # HTTP サーバーのホスト名を server セクションから取得し、未設定なら 0.0.0.0 を利用
     host = str(server_cfg.get("host", "0.0.0.0"))
@@ -124,11 +169,20 @@ def load_settings() -> Settings:
     return Settings(
         microsoft_app_id=microsoft_app_id,
         microsoft_app_password=microsoft_app_password,
+        max_conversations=max_conversations,
+        conversation_ttl_seconds=conversation_ttl_seconds,
+        history_max_messages=history_max_messages,
         llm_base_url=llm_base_url,
         llm_chat_path=llm_chat_path,
         llm_model=llm_model,
         llm_system_prompt=llm_system_prompt,
         llm_supports_vision=llm_supports_vision,
+        llm_cache_size=llm_cache_size,
+        llm_max_connections=llm_max_connections,
+        llm_max_keepalive_connections=llm_max_keepalive_connections,
+        llm_keepalive_expiry=llm_keepalive_expiry,
+        llm_http2=llm_http2,
+        llm_gzip_request_min_bytes=llm_gzip_request_min_bytes,
         host=host,
         port=port,
     )
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import time  # Activity 更新の間隔や会話の最終利用時刻を計測するために time モジュールをインポート
+from collections import OrderedDict  # 会話履歴を LRU として管理するために OrderedDict をインポート
 from typing import Any  # 任意の型を扱うために Any をインポート
 
 from botbuilder.core import (  # Bot Framework のコア機能を提供するクラス群をインポート
@@ -20,6 +22,12 @@ from .llm_client import llm_client  # ローカル LLM クライアントをイ
 from .settings import settings  # Vision 対応フラグなどの設定値をインポート
 
 
+# ストリーミング中に update_activity を呼び出す最小間隔（秒）
+_STREAM_UPDATE_INTERVAL_SECONDS = 0.2
+# 最小間隔に達していなくても update_activity を呼び出す、前回更新からの増加文字数
+_STREAM_UPDATE_MIN_CHARS = 128
+
+
 class TeamsLLMBot(ActivityHandler):
     """Teams からのメッセージを受け取りローカル LLM で応答を生成する Bot クラス。"""
 
@@ -28,31 +36,83 @@ class TeamsLLMBot(ActivityHandler):
 
         # 親クラス ActivityHandler の初期化処理を呼び出し、基底の状態を正しく設定
         super().__init__()
-        # 会話単位でメッセージ履歴を保持するための辞書を初期化
-        # キー: 会話 ID、値: role / content を持つメッセージ辞書のリスト
-        self._conversation_histories: dict[str, list[dict[str, str]]] = {}
+        # 会話単位でメッセージ履歴を保持するための順序付き辞書を初期化（末尾ほど最近利用された会話）
+        # キー: 会話 ID、値: 先頭にシステムプロンプトを含み、そのまま LLM に渡せる形のメッセージ辞書のリスト
+        self._conversation_histories: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+        # LLM による処理が必要なアクティビティ種別の集合（この Bot はメッセージ以外を扱わない）
+        self._handled_types = frozenset({"message"})
+        # 各会話のメッセージ配列の先頭に固定で置かれるメッセージ（システムプロンプト）の件数
+        self._history_offset = len(llm_client.new_messages_prefix())
+        # 会話 ID ごとの最終利用時刻を保持する辞書を初期化（一定時間利用の無い会話を破棄するために利用）
+        self._conversation_last_active: dict[str, float] = {}
+
+    def _evict_conversations(self, now: float) -> None:
+        """利用が途絶えた会話と、保持上限を超えた古い会話の履歴を破棄するヘルパーメソッド。"""
+
+        # 履歴は最終利用順に並んでいるため、先頭から順に有効期限切れかどうかを確認する
+        while self._conversation_histories:
+            # 最も長く利用されていない会話 ID を取得
+            oldest_id = next(iter(self._conversation_histories))
+            # 最終利用から有効期限が経過していなければ、それ以降の会話も期限内のため確認を終了
+            if now - self._conversation_last_active[oldest_id] < settings.conversation_ttl_seconds:
+                break
+            # 有効期限切れの会話の履歴と最終利用時刻を破棄
+            self._conversation_histories.popitem(last=False)
+            del self._conversation_last_active[oldest_id]
+        # 保持している会話数が上限を超えている場合は、最も長く利用されていない会話から破棄
+        while len(self._conversation_histories) > settings.max_conversations:
+            oldest_id, _ = self._conversation_histories.popitem(last=False)
+            del self._conversation_last_active[oldest_id]
+
+    def _get_history(self, conversation_id: str) -> list[dict[str, Any]]:
+        """会話 ID に対応する履歴を取得（無ければ生成）し、その会話を最近利用されたものとして扱うヘルパーメソッド。"""
+
+        # 現在時刻を取得し、期限切れの会話を先に破棄しておく
+        now = time.monotonic()
+        self._evict_conversations(now)
+        # 指定された会話 ID に対する履歴を取得
+        history = self._conversation_histories.get(conversation_id)
+        if history is None:
+            # 初回の会話ではシステムプロンプトだけを含むメッセージ配列を一度だけ生成して保存
+            history = llm_client.new_messages_prefix()
+            self._conversation_histories[conversation_id] = history
+        else:
+            # 既存の会話は最近利用されたものとして末尾へ移動
+            self._conversation_histories.move_to_end(conversation_id)
+        # 参照された会話の最終利用時刻を更新
+        self._conversation_last_active[conversation_id] = now
+        # 新しい会話を追加した場合に備え、保持上限を超えた古い会話を破棄
+        self._evict_conversations(now)
+        # 取得した履歴を呼び出し元に返す
+        return history
+
+    def _append_history(self, history: list[dict[str, Any]], user_text: str, reply_text: str) -> None:
+        """会話のメッセージ配列に今回のやり取りを追加し、上限件数を超えた古い履歴をその場で削除するヘルパーメソッド。"""
+
+        # 今回のユーザーメッセージと LLM 応答を配列の末尾に追加
+        history.append({"role": "user", "content": user_text})
+        history.append({"role": "assistant", "content": reply_text})
+        # 先頭のシステムプロンプトを除いた履歴件数が上限を超えた分を求める
+        overflow = len(history) - self._history_offset - settings.history_max_messages
+        # 超過分がある場合は、システムプロンプト直後の最も古い履歴から新しいリストを作らずに削除
+        if overflow > 0:
+            del history[self._history_offset : self._history_offset + overflow]
 
     async def on_message_activity(self, turn_context: TurnContext) -> None:
         """ユーザーからメッセージが送信された際に呼び出されるハンドラ。"""
 
         # 現在のアクティビティに含まれるエンティティ一覧を取得し、存在しない場合は空リストを利用
         entities = turn_context.activity.entities or []
-        # メンション対象を表すエンティティだけを抽出するためのリスト内包表現
-        mention_entities = [
-            entity for entity in entities if isinstance(entity, Entity) and entity.type == "mention"
-        ]
-        # Bot 自身が明示的にメンションされているかどうかを示すフラグを初期化
-        is_mentioned = False
-        # 抽出したメンションエンティティごとにループ処理を行う
-        for entity in mention_entities:
-            # entity の mentioned 属性からメンション対象情報を取得し、存在しない場合は None のまま扱う
-            mentioned = getattr(entity, "mentioned", None)
-            # mentioned が存在し、かつその id が Bot 自身の id と一致するかを確認
-            if mentioned and mentioned.id == turn_context.activity.recipient.id:
-                # 条件を満たした場合はメンション済みフラグを True に変更
-                is_mentioned = True
-                # 以降のループは不要なため break で抜ける
-                break
+        # Bot 自身の ID を一度だけ取得し、エンティティごとの属性参照を減らす
+        self_id = turn_context.activity.recipient.id
+        # Bot 自身を対象とするメンションエンティティが 1 つでもあるかを、中間リストを作らずに判定（見つかった時点で打ち切り）
+        is_mentioned = any(
+            isinstance(entity, Entity)
+            and entity.type == "mention"
+            and getattr(entity, "mentioned", None) is not None
+            and entity.mentioned.id == self_id
+            for entity in entities
+        )
         # Bot がメンションされていないメッセージの場合は何も応答せず早期 return する
         if not is_mentioned:
             # グループチャットやチームチャネルで他メッセージに干渉しないよう無応答で終了
@@ -73,10 +133,8 @@ class TeamsLLMBot(ActivityHandler):
 
         # 会話 ID を取得し、履歴辞書から該当会話のメッセージ履歴を取り出す
         conversation_id = turn_context.activity.conversation.id
-        # 指定された会話 ID に対する履歴が存在しなければ空リストを利用
-        history = self._conversation_histories.get(conversation_id, [])
-        # 直近 10 往復分（ユーザーと Bot のセット）に相当する 20 件だけを LLM に渡すためにスライス
-        limited_history = history[-20:] if len(history) > 20 else history
+        # 指定された会話 ID に対する、システムプロンプトと履歴を含むメッセージ配列を取得（無ければ生成）
+        history = self._get_history(conversation_id)
 
         # 現在のアクティビティに含まれる添付ファイル一覧を取得し、存在しない場合は空リストを利用
         attachments: list[Attachment] = turn_context.activity.attachments or []
@@ -102,23 +160,40 @@ class TeamsLLMBot(ActivityHandler):
         # 後続の update_activity で利用するため、送信した Activity に ID を設定
         reply_activity.id = resource.id
 
-        # LLM から受信したチャンクを結合していくためのバッファ文字列を初期化
-        accumulated_text = ""
+        # LLM から受信したチャンクを順番に格納していくリストを初期化（文字列の += による再コピーを避ける）
+        chunks: list[str] = []
+        # 現在までに受信したチャンクの合計文字数を初期化
+        received_length = 0
+        # 最後に update_activity で画面へ反映した時点の文字数を初期化
+        last_flushed_length = 0
+        # 最後に画面へ反映した時刻を初期化（初期メッセージ送信直後を起点とする）
+        last_flush_time = time.monotonic()
         # ローカル LLM クライアントのストリーミングメソッドを利用して疑似ストリーミングを実現
         async for chunk in llm_client.stream_reply(
             user_message=user_text,
-            history_messages=limited_history,
+            messages_prefix=history,
             image_urls=image_urls if settings.llm_supports_vision else None,
         ):
-            # 新たに受信したチャンク文字列をバッファ末尾に追加
-            accumulated_text += chunk
-            # Activity のテキスト部分を現在までの全文に更新
-            reply_activity.text = accumulated_text
+            # 新たに受信したチャンク文字列をリスト末尾に追加
+            chunks.append(chunk)
+            # 受信済みの合計文字数を更新
+            received_length += len(chunk)
+            # 前回の更新から一定時間も一定文字数も経過していない場合は、Teams への更新をまとめるためスキップ
+            if (
+                time.monotonic() - last_flush_time < _STREAM_UPDATE_INTERVAL_SECONDS
+                and received_length - last_flushed_length < _STREAM_UPDATE_MIN_CHARS
+            ):
+                continue
+            # Activity を更新する直前に、受信済みのチャンクを結合して全文を作成
+            reply_activity.text = "".join(chunks)
             # update_activity を呼び出して既存メッセージを上書き更新し、画面上で伸びていくように見せる
             await turn_context.update_activity(reply_activity)
+            # 今回反映した時刻と文字数を次回の判定用に記録
+            last_flush_time = time.monotonic()
+            last_flushed_length = received_length
 
-        # 最終的な応答テキストとして、蓄積された全文を変数に保存
-        final_text = accumulated_text or initial_text
+        # 最終的な応答テキストとして、受信した全チャンクを結合した全文を変数に保存
+        final_text = "".join(chunks) or initial_text
 
         # Vision 非対応モデルかつ画像が添付されていた場合は文末に注意書きを追加
         if should_append_vision_note:
@@ -127,20 +202,14 @@ class TeamsLLMBot(ActivityHandler):
                 f"{final_text}\n\n"
                 "<sub>画像認識には対応していないモデルです。</sub>"
             )
-            # Activity テキストも最終版に更新してから update_activity を一度だけ呼び出す
+
+        # 間引きにより未反映のチャンクや注意書きが残っている場合のみ、最終版で一度だけ update_activity を呼び出す
+        if reply_activity.text != final_text:
             reply_activity.text = final_text
             await turn_context.update_activity(reply_activity)
 
-        # 今回のユーザーメッセージと LLM 応答を履歴リストの末尾に追加
-        new_history = history + [
-            {"role": "user", "content": user_text},
-            {"role": "assistant", "content": final_text},
-        ]
-        # 履歴が 10 往復分（20 メッセージ）を超える場合は末尾 20 件だけ残す
-        if len(new_history) > 20:
-            new_history = new_history[-20:]
-        # 更新済みの履歴を会話 ID をキーとして辞書に保存
-        self._conversation_histories[conversation_id] = new_history
+        # 今回のユーザーメッセージと LLM 応答を履歴の末尾に追加し、上限を超えた古いメッセージを破棄
+        self._append_history(history, user_text, final_text)
 
     async def on_turn(
         self,
@@ -148,6 +217,9 @@ class TeamsLLMBot(ActivityHandler):
     ) -> None:
         """各ターン（リクエストごと）の共通前処理・後処理を行うオーバーライドメソッド。"""
 
+        # typing や conversationUpdate など、この Bot が処理しないアクティビティはディスパッチせずに早期 return する
+        if turn_context.activity.type not in self._handled_types:
+            return
         # 親クラス ActivityHandler の on_turn 実装を呼び出し、標準のディスパッチ処理を実行
         await super().on_turn(turn_context)
 
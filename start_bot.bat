@@ -32,7 +32,7 @@ pip install -r requirements.txt
 
 REM Launch application server
 echo [INFO] Starting Teams LLM Bot server...
-uvicorn src.bot.server:app --host 0.0.0.0 --port 3978 --reload
+uvicorn src.bot.server:app --host 0.0.0.0 --port 3978 --http httptools --reload
 
 ENDLOCAL
 